@@ -0,0 +1,168 @@
+"""
+Rating-migration analytics over the record history.
+
+Ratings on the national scale (AAA(bra) ... C(bra), with +/-) are mapped to
+ordinal codes once per distinct category of the RatingCollection; every
+per-record operation is then a NumPy array operation over the whole
+history, in a single pass.
+"""
+
+import numpy as np
+import pandas as pd
+
+from records import RatingCollection
+
+
+# do melhor para o pior
+RATING_SCALE = ["AAA(bra)"] + [
+    f"{base}{mod}(bra)"
+    for base in ["AA", "A", "BBB", "BB", "B", "CCC", "CC", "C"]
+    for mod in ["+", "", "-"]
+]
+
+# ordinal maior = rating melhor; -1 = ausente/fora da escala
+RATING_ORDINAL = {
+    rating: len(RATING_SCALE) - 1 - i
+    for i, rating in enumerate(RATING_SCALE)
+}
+
+UPGRADE = "Upgrade"
+DOWNGRADE = "Downgrade"
+UNCHANGED = "Mantido"
+UNKNOWN = "Indefinido"
+
+
+def _category_ordinals(collection, field):
+    categories = collection.categories(field)
+    lookup = np.array(
+        [RATING_ORDINAL.get(c.strip(), -1) for c in categories] or [-1],
+        dtype=np.int16,
+    )
+    return lookup[np.asarray(collection.codes(field), dtype=np.intp)]
+
+
+def rating_ordinals(records):
+    """
+    Retorna (anterior, atual) como arrays de ordinais (-1 = ausente).
+    """
+    collection = RatingCollection.from_records(records)
+
+    return (
+        _category_ordinals(collection, "rating_previous"),
+        _category_ordinals(collection, "rating_current"),
+    )
+
+
+def notch_deltas(records):
+    """
+    Variação em notches por registro (positivo = upgrade); NaN quando
+    falta um dos ratings.
+    """
+    prev, curr = rating_ordinals(records)
+    valid = (prev >= 0) & (curr >= 0)
+
+    deltas = np.full(len(prev), np.nan)
+    deltas[valid] = curr[valid] - prev[valid]
+    return deltas
+
+
+def directions(records):
+    """
+    Classificação de cada registro pelo sinal da variação em notches.
+    """
+    deltas = notch_deltas(records)
+
+    return np.select(
+        [deltas > 0, deltas < 0, deltas == 0],
+        [UPGRADE, DOWNGRADE, UNCHANGED],
+        default=UNKNOWN,
+    )
+
+
+def migration_matrix(records):
+    """
+    Matriz de transição (linhas = rating anterior, colunas = atual) com a
+    contagem de registros, na ordem de RATING_SCALE.
+    """
+    prev, curr = rating_ordinals(records)
+    valid = (prev >= 0) & (curr >= 0)
+
+    n = len(RATING_SCALE)
+    # ordinal -> posição na escala (0 = AAA)
+    rows = n - 1 - prev[valid].astype(np.intp)
+    cols = n - 1 - curr[valid].astype(np.intp)
+
+    counts = np.bincount(rows * n + cols, minlength=n * n).reshape(n, n)
+
+    return pd.DataFrame(counts, index=RATING_SCALE, columns=RATING_SCALE)
+
+
+def periods(records, freq="M"):
+    """
+    Período de cada registro a partir da data ("12 Feb 2026").
+    """
+    collection = RatingCollection.from_records(records)
+
+    # as datas também são categorias: converte só os valores distintos
+    categories = pd.to_datetime(
+        pd.Series(collection.categories("date"), dtype=object),
+        format="%d %b %Y",
+        errors="coerce",
+    )
+    lookup = categories.dt.to_period(freq).to_numpy()
+
+    codes = np.asarray(collection.codes("date"), dtype=np.intp)
+    return lookup[codes] if len(lookup) else np.array([], dtype=object)
+
+
+def counts_by_agency_period(records, freq="M"):
+    """
+    Número de upgrades/downgrades/mantidos por agência e período.
+    """
+    collection = RatingCollection.from_records(records)
+
+    agencies = pd.Categorical.from_codes(
+        np.asarray(collection.codes("agency"), dtype=np.intp),
+        categories=collection.categories("agency"),
+    )
+
+    df = pd.DataFrame({
+        "Agência": agencies,
+        "Período": periods(collection, freq),
+        "Direção": directions(collection),
+    })
+
+    table = (
+        df.groupby(["Agência", "Período", "Direção"], observed=True)
+        .size()
+        .unstack("Direção", fill_value=0)
+    )
+
+    for col in (UPGRADE, DOWNGRADE, UNCHANGED, UNKNOWN):
+        if col not in table.columns:
+            table[col] = 0
+
+    return table[[UPGRADE, DOWNGRADE, UNCHANGED, UNKNOWN]]
+
+
+def summary(records):
+    """
+    Resumo agregado de migração do conjunto de registros.
+    """
+    deltas = notch_deltas(records)
+    valid = ~np.isnan(deltas)
+
+    upgrades = int(np.count_nonzero(deltas > 0))
+    downgrades = int(np.count_nonzero(deltas < 0))
+
+    return {
+        "total": int(len(deltas)),
+        "comparable": int(np.count_nonzero(valid)),
+        "upgrades": upgrades,
+        "downgrades": downgrades,
+        "unchanged": int(np.count_nonzero(deltas == 0)),
+        "upgrade_downgrade_ratio":
+            upgrades / downgrades if downgrades else None,
+        "mean_notch_change":
+            float(np.mean(deltas[valid])) if valid.any() else None,
+    }
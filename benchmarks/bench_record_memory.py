@@ -0,0 +1,114 @@
+"""
+Memory benchmark: 1M records as a list of plain dataclasses (the original
+RatingRecord) versus a list of slotted records versus RatingCollection.
+
+    python benchmarks/bench_record_memory.py [n]
+"""
+
+from dataclasses import dataclass
+import tracemalloc
+import random
+import time
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from records import RatingRecord, RatingCollection  # noqa: E402
+
+
+@dataclass
+class PlainRatingRecord:
+    agency: str
+    company: str
+    rating_current: str
+    rating_previous: str
+    outlook_current: str
+    outlook_previous: str
+    action: str
+    date: str
+    link: str
+    listing_fields: str = ""
+
+
+AGENCIES = ["Fitch", "Moody's", "S&P"]
+RATINGS = [
+    f"{base}{mod}(bra)"
+    for base in ["AAA", "AA", "A", "BBB", "BB", "B", "CCC", "CC", "C"]
+    for mod in ["+", "", "-"]
+]
+OUTLOOKS = ["Estável", "Positiva", "Negativa", ""]
+ACTIONS = ["Afirmado", "Upgrade", "Downgrade", "Novo Rating", "Outro"]
+LISTING_FIELDS = ["", "agency,company,rating_current,action"]
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun",
+          "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+
+def fresh(s):
+    # o scraper cria uma str nova a cada página; evita o compartilhamento
+    # de literais que mascararia o custo real da lista de dataclasses
+    return "".join(list(s))
+
+
+def generate_rows(n, seed=0):
+    rnd = random.Random(seed)
+
+    for i in range(n):
+        yield (
+            fresh(rnd.choice(AGENCIES)),
+            fresh(f"Empresa {rnd.randrange(5000)} S.A."),
+            fresh(rnd.choice(RATINGS)),
+            fresh(rnd.choice(RATINGS)),
+            fresh(rnd.choice(OUTLOOKS)),
+            fresh(rnd.choice(OUTLOOKS)),
+            fresh(rnd.choice(ACTIONS)),
+            fresh(f"{rnd.randint(1, 28)} {rnd.choice(MONTHS)} "
+                  f"{rnd.randint(2015, 2026)}"),
+            f"https://www.fitchratings.com/research/rac-{i}",
+            fresh(rnd.choice(LISTING_FIELDS)),
+        )
+
+
+def measure(label, build, n):
+    tracemalloc.start()
+    started = time.perf_counter()
+
+    result = build(generate_rows(n))
+
+    elapsed = time.perf_counter() - started
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{label:<28} {current / 2**20:>9.1f} MiB {elapsed:>8.2f} s")
+    del result
+    return current
+
+
+def build_collection(rows):
+    collection = RatingCollection()
+    for row in rows:
+        collection.append_row(row)
+    return collection
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    print(f"{n} registros")
+    plain = measure(
+        "list[dataclass]",
+        lambda rows: [PlainRatingRecord(*r) for r in rows],
+        n,
+    )
+    measure(
+        "list[dataclass(slots)]",
+        lambda rows: [RatingRecord(*r) for r in rows],
+        n,
+    )
+    compact = measure("RatingCollection", build_collection, n)
+
+    # sanidade: a coleção precisa estar completa e alinhada
+    check = build_collection(generate_rows(1000))
+    assert len(check) == len(list(check)) == len(check.to_frame()) == 1000
+
+    print(f"redução: {plain / compact:.1f}x")
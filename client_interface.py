@@ -1,10 +1,16 @@
 import sys
 import os
-from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout, QPushButton, QLabel
+import logging
+from dataclasses import replace
+from PyQt5.QtWidgets import (
+    QApplication, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel,
+    QProgressBar
+)
 from PyQt5.QtWebEngineWidgets import QWebEngineView, QWebEngineSettings, QWebEnginePage
 from PyQt5.QtCore import QThread, pyqtSignal, QUrl, QTimer
 from PyQt5.QtGui import QDesktopServices
 from main import main
+from generate_pdf import GeneratePDF
 
 
 class ExternalLinkPage(QWebEnginePage):
@@ -19,9 +25,51 @@ class ExternalLinkPage(QWebEnginePage):
 
 class Worker(QThread):
     finished = pyqtSignal(str)
+    progress = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+        self._cancelled = False
+
+    def cancel(self):
+        # cancelamento cooperativo: o scraper verifica entre as esperas
+        self._cancelled = True
+
+    def is_cancelled(self):
+        return self._cancelled
+
+    def report_progress(self, status):
+        # cópia: o scraper continua atualizando o objeto original
+        self.progress.emit(replace(status))
 
     def run(self):
-        pdf_path = main()
+        try:
+            pdf_path = main(
+                progress=self.report_progress,
+                should_cancel=self.is_cancelled,
+                on_record=self.records.append,
+            )
+        except Exception as e:
+            logging.exception("Erro na geração do relatório.")
+
+            if not self.records:
+                self.failed.emit(f"Erro: {e}")
+                return
+
+            # gera o PDF com o que foi coletado até a falha
+            try:
+                pdf_path = GeneratePDF.generate_pdf(self.records)
+            except Exception as render_error:
+                logging.exception("Erro ao gerar o PDF parcial.")
+                self.failed.emit(f"Erro: {render_error}")
+                return
+
+        if pdf_path is None:
+            self.failed.emit("Execução cancelada.")
+            return
+
         self.finished.emit(pdf_path)
 
 
@@ -36,9 +84,18 @@ class PDFApp(QWidget):
         self.layout.setSpacing(10)
         self.setLayout(self.layout)
 
+        buttons = QHBoxLayout()
+
         self.btn_generate = QPushButton("Gerar PDF")
         self.btn_generate.clicked.connect(self.generate_pdf)
-        self.layout.addWidget(self.btn_generate, 0)
+        buttons.addWidget(self.btn_generate, 1)
+
+        self.btn_cancel = QPushButton("Cancelar")
+        self.btn_cancel.clicked.connect(self.cancel_generation)
+        self.btn_cancel.setEnabled(False)
+        buttons.addWidget(self.btn_cancel, 0)
+
+        self.layout.addLayout(buttons, 0)
 
         self.btn_back_pdf = QPushButton("Voltar ao PDF")
         self.btn_back_pdf.clicked.connect(self.back_to_pdf)
@@ -48,6 +105,10 @@ class PDFApp(QWidget):
         self.label_status = QLabel("Pronto para gerar relatório.")
         self.layout.addWidget(self.label_status, 0)
 
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setVisible(False)
+        self.layout.addWidget(self.progress_bar, 0)
+
         # self.pdf_view = QWebEngineView()
         self.pdf_view = QWebEngineView()
         self.pdf_view.setPage(ExternalLinkPage(self.pdf_view))
@@ -97,6 +158,18 @@ class PDFApp(QWidget):
                 color: #cccccc;
             }
 
+            QProgressBar {
+                background-color: #1e1e1e;
+                border-radius: 6px;
+                text-align: center;
+                color: #ffffff;
+            }
+
+            QProgressBar::chunk {
+                background-color: #E57200;
+                border-radius: 6px;
+            }
+
             QWebEngineView {
                 border-radius: 10px;
                 background-color: white;
@@ -105,15 +178,51 @@ class PDFApp(QWidget):
         """)
 
     def generate_pdf(self):
-        self.label_status.setText("Gerando PDF, aguarde...")
+        self.label_status.setText("Buscando ações de rating...")
         self.btn_generate.setEnabled(False)
+        self.btn_cancel.setEnabled(True)
+
+        # indeterminada até a listagem ser carregada
+        self.progress_bar.setRange(0, 0)
+        self.progress_bar.setVisible(True)
 
         self.worker = Worker()
         self.worker.finished.connect(self.show_pdf)
+        self.worker.progress.connect(self.update_progress)
+        self.worker.failed.connect(self.show_error)
         self.worker.start()
 
-    def show_pdf(self, pdf_path):
+    def cancel_generation(self):
+        self.btn_cancel.setEnabled(False)
+        self.label_status.setText(
+            "Cancelando... o PDF será gerado com os registros já coletados."
+        )
+        self.worker.cancel()
+
+    def update_progress(self, status):
+        self.progress_bar.setRange(0, max(status.found, 1))
+        self.progress_bar.setValue(status.done)
+
+        if self.worker.is_cancelled():
+            return
+
+        self.label_status.setText(
+            f"Links: {status.found} | páginas abertas: {status.opened} | "
+            f"registros: {status.fetched} | ignorados: {status.skipped} | "
+            f"restante: ~{int(status.eta)}s"
+        )
+
+    def finish_generation(self):
         self.btn_generate.setEnabled(True)
+        self.btn_cancel.setEnabled(False)
+        self.progress_bar.setVisible(False)
+
+    def show_error(self, message):
+        self.finish_generation()
+        self.label_status.setText(message)
+
+    def show_pdf(self, pdf_path):
+        self.finish_generation()
 
         abs_path = os.path.abspath(pdf_path)
 
@@ -125,7 +234,10 @@ class PDFApp(QWidget):
         self.current_pdf_path = abs_path
         self.btn_back_pdf.setEnabled(True)
 
-        self.label_status.setText(f"PDF gerado: {abs_path}")
+        if self.worker.is_cancelled():
+            self.label_status.setText(f"PDF parcial gerado: {abs_path}")
+        else:
+            self.label_status.setText(f"PDF gerado: {abs_path}")
 
         url = QUrl.fromLocalFile(abs_path)
         self.pdf_view.setUrl(url)
@@ -0,0 +1,329 @@
+"""
+Headless service mode: runs the scraper on a schedule, keeps the browser
+warm between ticks and only regenerates the PDF when the record set changed.
+"""
+
+from playwright.sync_api import sync_playwright
+from datetime import date, timedelta
+import argparse
+import logging
+import json
+import time
+import os
+
+import scrapping_rating_actions
+import generate_pdf
+from records import RatingCollection
+from issuer_index import IssuerIndex
+
+
+STATE_PATH = os.path.join("output", "daemon_state.json")
+DEFAULT_INTERVAL = 900
+
+# por quantos dias um link já processado continua conhecido depois de sair
+# da listagem
+SEEN_RETENTION_DAYS = 90
+
+# listagem com menos que essa fração dos links da anterior é tratada como
+# falha de carregamento, até se repetir por SHRINK_CONFIRM_TICKS ticks
+MIN_LISTING_RATIO = 0.5
+SHRINK_CONFIRM_TICKS = 3
+
+
+def empty_state() -> dict:
+    return {
+        # última listagem aceita (sem os links que falharam)
+        "links": [],
+        # link -> data (ISO) em que foi processado pela primeira vez
+        "seen": {},
+        "records": None,
+        "pdf_path": "",
+        "short_listings": 0,
+    }
+
+
+def load_state(path=STATE_PATH) -> dict:
+    if not os.path.exists(path):
+        return empty_state()
+
+    try:
+        with open(path, encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        logging.warning("Estado anterior inválido, iniciando do zero.")
+        return empty_state()
+
+    # estado salvo antes de "seen": os links da listagem já foram vistos
+    if "seen" not in state:
+        today = date.today().isoformat()
+        state["seen"] = {link: today for link in state.get("links", [])}
+
+    return {**empty_state(), **state}
+
+
+def save_state(state: dict, path=STATE_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+
+    os.replace(tmp_path, path)
+
+
+class RatingDaemon:
+    """
+    Cada tick carrega apenas a listagem de busca. Se os links forem os
+    mesmos do tick anterior, nada mais é feito; caso contrário só os links
+    nunca vistos são abertos e o PDF é regenerado se o conjunto de
+    registros da listagem mudou.
+
+    Links já processados e seus registros ficam no estado por
+    SEEN_RETENTION_DAYS dias, independentemente da listagem atual: um link
+    que some de uma listagem parcial e volta depois não é anunciado de
+    novo. Uma listagem vazia ou muito menor que a anterior conta como
+    falha do tick.
+    """
+
+    def __init__(self, interval=DEFAULT_INTERVAL, state_path=STATE_PATH,
+                 on_new_actions=None, queries=None, issuer_index=None,
+                 max_rss_mb=None):
+        self.interval = interval
+        self.max_rss_mb = max_rss_mb
+        self.queries = queries
+        # deduplica emissores entre execuções, com aliases persistidos
+        self.issuer_index = issuer_index or IssuerIndex()
+        self.state_path = state_path
+        self.on_new_actions = on_new_actions
+        self.state = load_state(state_path)
+
+    def tick(self, page) -> bool:
+        """
+        Executa uma verificação. Retorna True se o relatório foi regenerado.
+        `page` pode ser uma Page ou um PageRecycler.
+        """
+        if self.queries:
+            # no navegador do serviço, sem abrir um Chromium por busca
+            rows = scrapping_rating_actions.collect_rows_on_page(
+                page, self.queries
+            )
+        else:
+            rows = scrapping_rating_actions.extract_basic_rows(
+                scrapping_rating_actions.current_page(page)
+            )
+
+        links = [row["link"] for row in rows]
+
+        if not self.accept_listing(links):
+            return False
+
+        known_links = set(self.state["links"])
+
+        if set(links) == known_links:
+            logging.info("Nenhuma ação nova publicada.")
+            return False
+
+        seen = self.state["seen"]
+
+        stored = RatingCollection()
+        if self.state["records"]:
+            stored = RatingCollection.from_dict(self.state["records"])
+        by_link = {r.link: r for r in stored}
+
+        previous = RatingCollection(
+            by_link[link] for link in self.state["links"] if link in by_link
+        )
+
+        # deduplica contra os registros que continuam na listagem
+        current = set(links)
+        seen_records = {
+            scrapping_rating_actions.record_key(r, self.issuer_index)
+            for link, r in by_link.items() if link in current
+        }
+
+        new_rows = [row for row in rows if row["link"] not in seen]
+        failed_links = set()
+        new_records = scrapping_rating_actions.scrape_rows(
+            page,
+            new_rows,
+            seen_records=seen_records,
+            issuer_index=self.issuer_index,
+            failed_links=failed_links,
+        )
+        self.issuer_index.save()
+
+        # links que falharam não entram como vistos: são tentados de novo
+        # no próximo tick
+        if failed_links:
+            logging.info(f"{len(failed_links)} link(s) serão tentados de novo.")
+
+        today = date.today()
+        for row in new_rows:
+            if row["link"] not in failed_links:
+                seen.setdefault(row["link"], today.isoformat())
+
+        for r in new_records:
+            by_link[r.link] = r
+
+        self.prune_seen(today, current)
+
+        # mantém a ordem da listagem
+        records = RatingCollection(
+            by_link[link] for link in links if link in by_link
+        )
+
+        changed = (
+            records != previous
+            or not os.path.exists(self.state.get("pdf_path") or "")
+        )
+
+        self.state["links"] = [
+            link for link in links if link not in failed_links
+        ]
+        self.state["records"] = RatingCollection(
+            r for link, r in by_link.items() if link in seen
+        ).to_dict()
+
+        # mesmo vazio, o relatório precisa refletir o conjunto atual
+        if changed:
+            self.state["pdf_path"] = \
+                generate_pdf.GeneratePDF.generate_pdf(records)
+            logging.info(f"PDF regenerado: {self.state['pdf_path']}")
+
+        save_state(self.state, self.state_path)
+
+        if new_records:
+            self.emit_new_actions(new_records)
+
+        return changed
+
+    def accept_listing(self, links) -> bool:
+        """
+        False se a listagem parece ter falhado ao carregar: vazia, ou com
+        menos de MIN_LISTING_RATIO dos links da anterior. Uma listagem
+        menor que se repete por SHRINK_CONFIRM_TICKS ticks é aceita.
+        """
+        if not links:
+            logging.warning("Listagem vazia; tick ignorado.")
+            return False
+
+        previous = len(self.state["links"])
+        if previous and len(links) < previous * MIN_LISTING_RATIO:
+            self.state["short_listings"] += 1
+
+            if self.state["short_listings"] < SHRINK_CONFIRM_TICKS:
+                logging.warning(
+                    f"Listagem com {len(links)} links (anterior: "
+                    f"{previous}); tick ignorado."
+                )
+                return False
+
+            logging.info(
+                f"Listagem menor confirmada em "
+                f"{self.state['short_listings']} ticks; aceitando."
+            )
+
+        self.state["short_listings"] = 0
+        return True
+
+    def prune_seen(self, today, current):
+        """
+        Esquece links vistos há mais de SEEN_RETENTION_DAYS dias que não
+        estão mais na listagem.
+        """
+        cutoff = (today - timedelta(days=SEEN_RETENTION_DAYS)).isoformat()
+        seen = self.state["seen"]
+
+        for link in [l for l, d in seen.items() if d < cutoff]:
+            if link not in current:
+                del seen[link]
+
+    def emit_new_actions(self, records):
+        logging.info(f"{len(records)} nova(s) ação(ões) de rating.")
+
+        for r in records:
+            logging.info(f"Nova ação: {r.company} | {r.action} | {r.link}")
+
+        if self.on_new_actions:
+            self.on_new_actions(records)
+
+    def run(self, max_ticks=None):
+        ticks = 0
+
+        with sync_playwright() as p:
+            browser = None
+
+            try:
+                while max_ticks is None or ticks < max_ticks:
+                    started = time.monotonic()
+
+                    try:
+                        # mantém o navegador aberto entre os ticks
+                        if browser is None or not browser.is_connected():
+                            browser = \
+                                scrapping_rating_actions.launch_browser(p)
+                            # recicla a página para a memória não crescer
+                            # ao longo dos ticks
+                            recycler = scrapping_rating_actions.PageRecycler(
+                                browser,
+                                max_rss_mb=self.max_rss_mb,
+                            )
+
+                        self.tick(recycler)
+
+                    except Exception:
+                        logging.exception("Erro no tick, reiniciando navegador.")
+                        if browser is not None:
+                            try:
+                                browser.close()
+                            except Exception:
+                                pass
+                        browser = None
+
+                    ticks += 1
+                    if max_ticks is not None and ticks >= max_ticks:
+                        break
+
+                    elapsed = time.monotonic() - started
+                    time.sleep(max(0, self.interval - elapsed))
+
+            except KeyboardInterrupt:
+                logging.info("Encerrando serviço.")
+
+            finally:
+                if browser is not None:
+                    browser.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Executa o scraping de ações de rating periodicamente."
+    )
+    parser.add_argument(
+        "--interval",
+        type=int,
+        default=DEFAULT_INTERVAL,
+        help="intervalo entre execuções, em segundos",
+    )
+    parser.add_argument(
+        "--state",
+        default=STATE_PATH,
+        help="arquivo de estado entre execuções",
+    )
+    parser.add_argument(
+        "--max-rss-mb",
+        type=int,
+        help="recicla a página quando o navegador passar desse RSS (MB)",
+    )
+    parser.add_argument(
+        "--once",
+        action="store_true",
+        help="executa uma única verificação e sai",
+    )
+    args = parser.parse_args()
+
+    RatingDaemon(
+        interval=args.interval,
+        state_path=args.state,
+        max_rss_mb=args.max_rss_mb,
+    ).run(max_ticks=1 if args.once else None)
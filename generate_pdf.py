@@ -11,14 +11,161 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.enums import TA_LEFT
 from reportlab.lib.units import mm
 
-from dataclasses import asdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime
 import pandas as pd
+import hashlib
+import logging
+import shutil
+import json
+import time
 import os
 
+from records import RatingCollection, FIELDS
+import analytics
+
+
+# incrementar sempre que o layout do relatório mudar, para invalidar o cache
+TEMPLATE_VERSION = "1"
+
+CACHE_DIR = os.path.join("output", "cache")
+CACHE_MAX_ENTRIES = 32
+
+# variantes do lote ficam em output/batch/, sem sobrescrever output/ratings.pdf
+BATCH_DIR = "batch"
+
+
+@dataclass
+class ReportSpec:
+    """
+    Variante do relatório: filtros sobre os registros (campo de
+    RatingRecord -> valor ou tupla de valores), título e nome do arquivo de
+    saída (dentro de output/batch/).
+    """
+    output_name: str
+    title: str = "Ratings"
+    filters: dict = field(default_factory=dict)
+    include_summary: bool = False
+
+
+@dataclass
+class ReportResult:
+    spec: ReportSpec
+    output_path: str
+    seconds: float
+
+
+def _render_spec(records, output_name, title, include_summary, use_cache):
+    # executado nos processos do pool
+    started = time.perf_counter()
+    path = GeneratePDF.generate_pdf(
+        records,
+        output_name,
+        use_cache=use_cache,
+        include_summary=include_summary,
+        title=title,
+        # o processo pai poda o cache uma única vez, ao final do lote
+        prune_cache=False,
+    )
+    return path, time.perf_counter() - started
+
 
 class GeneratePDF:
 
+    @staticmethod
+    def records_hash(records, fmt="pdf", options=None):
+        """
+        Hash estável dos registros + versão do template + formato +
+        opções de renderização.
+        """
+        payload = json.dumps(
+            {
+                "template": TEMPLATE_VERSION,
+                "format": fmt,
+                "options": options or {},
+                "fields": FIELDS,
+                "records": [
+                    list(row)
+                    for row in RatingCollection.from_records(records).rows()
+                ],
+            },
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _prune_cache(max_entries=CACHE_MAX_ENTRIES):
+        entries = [
+            os.path.join(CACHE_DIR, name)
+            for name in os.listdir(CACHE_DIR)
+            if not name.endswith(".tmp")
+        ]
+
+        if len(entries) <= max_entries:
+            return
+
+        # remove os menos usados (mtime atualizado a cada acerto)
+        dated = []
+        for path in entries:
+            try:
+                dated.append((os.path.getmtime(path), path))
+            except OSError:
+                # removido por outra renderização no meio da listagem
+                pass
+
+        dated.sort()
+        for _, path in dated[:len(dated) - max_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    @classmethod
+    def _cached_render(cls, records, output_path, fmt, render, options=None,
+                       prune=True):
+        """
+        Renderiza via `render(records, path, **options)` apenas se o conjunto de
+        registros ainda não estiver no cache; caso contrário copia o
+        artefato já gerado para `output_path`.
+        prune: poda o cache (LRU) após renderizar.
+        """
+        os.makedirs(CACHE_DIR, exist_ok=True)
+
+        options = options or {}
+        key = cls.records_hash(records, fmt, options)
+        cached_path = os.path.join(CACHE_DIR, f"{key}.{fmt}")
+
+        if os.path.exists(cached_path):
+            try:
+                os.utime(cached_path)
+                shutil.copyfile(cached_path, output_path)
+                logging.info(f"Relatório em cache: {cached_path}")
+                return output_path
+            except FileNotFoundError:
+                # removido por outra renderização; gera de novo
+                pass
+
+        # pid no nome: renderizações paralelas não colidem
+        tmp_path = f"{cached_path}.{os.getpid()}.tmp"
+        try:
+            render(records, tmp_path, **options)
+
+            # copia antes de entrar no cache, onde pode ser removido
+            shutil.copyfile(tmp_path, output_path)
+            os.replace(tmp_path, cached_path)
+        finally:
+            # render ou cópia falhou: não deixa o temporário no cache
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        if prune:
+            cls._prune_cache()
+
+        return output_path
+
     @staticmethod
     def _week_label_from_df(df):
         dates = pd.to_datetime(df["Data"], format="%d %b %Y", errors="coerce")
@@ -41,18 +188,126 @@ class GeneratePDF:
         return f"({start.day} a {end.day} de {mes})"
 
     @classmethod
-    def generate_pdf(cls, records, output_path="ratings.pdf"):
+    def generate_pdf(cls, records, output_path="ratings.pdf", use_cache=True,
+                     include_summary=False, title="Ratings",
+                     prune_cache=True):
         """
-        records: lista de RatingRecord
+        records: lista de RatingRecord ou RatingCollection
+        include_summary: inclui o resumo de migração de ratings
+        title: título exibido no topo do relatório
+        prune_cache: poda o cache após renderizar
         """
 
-        os.makedirs("output", exist_ok=True)
         output_path = os.path.join("output", output_path)
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+        if not use_cache:
+            cls._render_pdf(records, output_path, include_summary, title)
+            return output_path
+
+        return cls._cached_render(
+            records,
+            output_path,
+            "pdf",
+            cls._render_pdf,
+            {"include_summary": include_summary, "title": title},
+            prune=prune_cache,
+        )
 
+    @staticmethod
+    def _unique_names(specs):
+        names = []
+        used = set()
+
+        for spec in specs:
+            base, ext = os.path.splitext(os.path.basename(spec.output_name))
+            ext = ext or ".pdf"
+            name = f"{base}{ext}"
+
+            n = 2
+            while name in used:
+                name = f"{base}_{n}{ext}"
+                n += 1
+
+            used.add(name)
+            names.append(os.path.join(BATCH_DIR, name))
+
+        return names
+
+    @classmethod
+    def generate_batch(cls, records, specs, max_workers=None, use_cache=True):
+        """
+        Gera várias variantes do relatório em paralelo, em um pool de
+        processos. Retorna um ReportResult (caminho e tempo) por spec.
+        """
+        # valida todos os filtros antes de abrir o pool
+        for spec in specs:
+            unknown = sorted(set(spec.filters) - set(FIELDS))
+            if unknown:
+                raise ValueError(
+                    f"Filtro(s) {', '.join(unknown)} em {spec.output_name}: "
+                    f"RatingRecord não tem esse(s) campo(s). "
+                    f"Campos disponíveis: {', '.join(FIELDS)}."
+                )
+
+        collection = RatingCollection.from_records(records)
+        names = cls._unique_names(specs)
+
+        results = []
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(
+                    _render_spec,
+                    # filtra aqui: cada processo recebe só o seu subconjunto
+                    collection.filter(**spec.filters),
+                    name,
+                    spec.title,
+                    spec.include_summary,
+                    use_cache,
+                )
+                for spec, name in zip(specs, names)
+            ]
+
+            for spec, future in zip(specs, futures):
+                path, seconds = future.result()
+                logging.info(f"{path} gerado em {seconds:.2f}s")
+                results.append(ReportResult(spec, path, seconds))
+
+        if use_cache:
+            # o lote não conta no limite: não expulsa o relatório principal
+            cls._prune_cache(CACHE_MAX_ENTRIES + len(specs))
+
+        return results
+
+    @staticmethod
+    def _summary_text(records):
+        s = analytics.summary(records)
+
+        text = (
+            f"Resumo: {s['upgrades']} upgrade(s), "
+            f"{s['downgrades']} downgrade(s), "
+            f"{s['unchanged']} rating(s) mantido(s)"
+        )
+
+        if s["upgrade_downgrade_ratio"] is not None:
+            text += (
+                f"; razão upgrade/downgrade "
+                f"{s['upgrade_downgrade_ratio']:.2f}"
+            )
+
+        if s["mean_notch_change"] is not None:
+            text += f"; variação média {s['mean_notch_change']:+.2f} notch"
+
+        return text + "."
+
+    @classmethod
+    def _render_pdf(cls, records, output_path, include_summary=False,
+                    title="Ratings"):
         # -------------------------
         # Converter para DataFrame
         # -------------------------
-        df = pd.DataFrame([asdict(r) for r in records])
+        # colunas montadas direto da coleção, sem dict por registro
+        df = RatingCollection.from_records(records).to_frame().astype(object)
 
         df.rename(columns={
             "date": "Data",
@@ -142,6 +397,13 @@ class GeneratePDF:
             spaceAfter=10,
         )
 
+        summary_style = ParagraphStyle(
+            "summary",
+            parent=styles["Normal"],
+            fontSize=10,
+            spaceAfter=6,
+        )
+
         footer_style = ParagraphStyle(
             "footer",
             parent=styles["Normal"],
@@ -151,7 +413,7 @@ class GeneratePDF:
 
         elements = []
 
-        elements.append(Paragraph("Ratings", title_style))
+        elements.append(Paragraph(title, title_style))
         week_label = cls._week_label_from_df(df)
 
         elements.append(
@@ -161,6 +423,11 @@ class GeneratePDF:
             )
         )
 
+        if include_summary:
+            elements.append(
+                Paragraph(cls._summary_text(records), summary_style)
+            )
+
         elements.append(Spacer(1, 6))
 
         # -------------------------
@@ -274,4 +541,3 @@ class GeneratePDF:
         )
 
         doc.build(elements)
-        return output_path
@@ -0,0 +1,176 @@
+"""
+Normalised issuer index: maps every spelling of an issuer name
+("Empresa X S.A.", "Empresa X S/A", "EMPRESA X SA") to one canonical key,
+with aliases kept on disk between runs.
+
+    python issuer_index.py list
+    python issuer_index.py link "Empresa X Participações" "Empresa X S.A."
+"""
+
+import numpy as np
+import logging
+import json
+import sys
+import os
+import re
+
+from records import RatingCollection
+from relevance import normalize
+
+
+INDEX_PATH = os.path.join("output", "issuer_index.json")
+
+# sufixos societários removidos do fim do nome
+CORPORATE_SUFFIXES = {
+    "sa", "ltda", "eireli", "epp", "me",
+    "inc", "ltd", "llc", "plc", "corp", "co",
+}
+
+
+def normalize_issuer(name: str) -> str:
+    """
+    Chave canônica do emissor: sem acentos, minúsculas, sem pontuação e
+    sem sufixos societários no final.
+    """
+    key = normalize(name or "")
+
+    # "s.a.", "s/a", "s. a." -> "sa"
+    key = re.sub(r"\bs\s*[./]\s*a\b\.?", " sa ", key)
+    key = re.sub(r"[^\w\s]", " ", key)
+
+    tokens = key.split()
+    while len(tokens) > 1 and tokens[-1] in CORPORATE_SUFFIXES:
+        tokens.pop()
+
+    return " ".join(tokens)
+
+
+class IssuerIndex:
+    """
+    aliases: chave normalizada -> chave canônica (lookup O(1)).
+    issuers: chave canônica -> nome de exibição e variações vistas.
+    """
+
+    def __init__(self, path=INDEX_PATH):
+        self.path = path
+        self.aliases = {}
+        self.issuers = {}
+
+        if path and os.path.exists(path):
+            self.load()
+
+    def load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            logging.warning(f"Índice de emissores inválido: {self.path}")
+            return
+
+        self.aliases = data.get("aliases", {})
+        self.issuers = data.get("issuers", {})
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"aliases": self.aliases, "issuers": self.issuers},
+                f,
+                ensure_ascii=False,
+                indent=2,
+            )
+
+        os.replace(tmp_path, self.path)
+
+    def key(self, name: str) -> str:
+        normalized = normalize_issuer(name)
+        return self.aliases.get(normalized, normalized)
+
+    def add(self, name: str) -> str:
+        """
+        Registra a grafia `name` e retorna a chave canônica do emissor.
+        """
+        key = self.key(name)
+        if not key:
+            return key
+
+        issuer = self.issuers.setdefault(key, {"name": name, "aliases": []})
+        if name not in issuer["aliases"]:
+            issuer["aliases"].append(name)
+
+        return key
+
+    def link(self, alias: str, canonical: str) -> str:
+        """
+        Declara que `alias` é o mesmo emissor que `canonical` (ex.: nome
+        antigo ou nome de holding usado nos títulos).
+        """
+        target = self.add(canonical)
+        source = normalize_issuer(alias)
+
+        if not target or not source:
+            raise ValueError(
+                f"Nome de emissor vazio após normalização: "
+                f"{alias!r} -> {canonical!r}"
+            )
+
+        if source == target:
+            return target
+
+        # repassa tudo o que apontava para a chave antiga
+        for k, v in self.aliases.items():
+            if v == source:
+                self.aliases[k] = target
+        self.aliases[source] = target
+
+        merged = self.issuers.pop(source, None)
+        if merged:
+            for a in merged["aliases"]:
+                if a not in self.issuers[target]["aliases"]:
+                    self.issuers[target]["aliases"].append(a)
+
+        self.add(alias)
+        return target
+
+    def name(self, key: str) -> str:
+        issuer = self.issuers.get(key)
+        return issuer["name"] if issuer else key
+
+    def history(self, records, name: str):
+        """
+        Registros do emissor `name` em qualquer grafia.
+        """
+        collection = RatingCollection.from_records(records)
+        target = self.key(name)
+
+        # uma normalização por nome distinto, não por registro
+        matches = np.array(
+            [self.key(c) == target for c in collection.categories("company")]
+            or [False]
+        )
+        mask = matches[np.asarray(collection.codes("company"), dtype=np.intp)]
+
+        return collection.take(np.flatnonzero(mask))
+
+
+if __name__ == "__main__":
+    index = IssuerIndex()
+
+    if len(sys.argv) == 4 and sys.argv[1] == "link":
+        try:
+            key = index.link(sys.argv[2], sys.argv[3])
+        except ValueError as e:
+            sys.exit(str(e))
+        index.save()
+        print(f"{sys.argv[2]} -> {index.name(key)}")
+
+    elif len(sys.argv) == 2 and sys.argv[1] == "list":
+        for key, issuer in sorted(index.issuers.items()):
+            print(f"{issuer['name']} [{key}]")
+            for alias in issuer["aliases"]:
+                print(f"  {alias}")
+
+    else:
+        print(__doc__.strip())
@@ -7,8 +7,18 @@ import scrapping_rating_actions
 import generate_pdf
 
 
-def main():
-    data = scrapping_rating_actions.run_scraper()
+def main(progress=None, should_cancel=None, on_record=None, fast=False):
+    data = scrapping_rating_actions.run_scraper(
+        progress=progress,
+        should_cancel=should_cancel,
+        on_record=on_record,
+        fast=fast,
+    )
+
+    # cancelado sem registros: não sobrescreve o último relatório
+    if should_cancel and should_cancel() and not data:
+        return None
+
     return generate_pdf.GeneratePDF.generate_pdf(data)
 
 
@@ -0,0 +1,305 @@
+"""
+Rating records and a compact, column-oriented collection for large
+histories.
+
+Each field of RatingRecord is stored as a column. Fields with a small,
+repetitive vocabulary (agency, rating, outlook, action, ...) are
+dictionary-encoded: the column keeps an array of integer codes and each
+distinct string is stored only once, in the domain's category list.
+"""
+
+from dataclasses import dataclass, fields
+from array import array
+import numpy as np
+import pandas as pd
+
+
+@dataclass(slots=True)
+class RatingRecord:
+    agency: str
+    company: str
+    rating_current: str
+    rating_previous: str
+    outlook_current: str
+    outlook_previous: str
+    action: str
+    date: str
+    link: str
+    # campos preenchidos a partir do título da listagem (modo rápido),
+    # separados por vírgula; vazio quando tudo veio da página da ação
+    listing_fields: str = ""
+
+
+FIELDS = tuple(f.name for f in fields(RatingRecord))
+
+# campo -> domínio do dicionário; campos do mesmo domínio compartilham
+# as categorias (ex.: rating atual e anterior usam a mesma escala)
+ENCODED_FIELDS = {
+    "agency": "agency",
+    "company": "company",
+    "rating_current": "rating",
+    "rating_previous": "rating",
+    "outlook_current": "outlook",
+    "outlook_previous": "outlook",
+    "action": "action",
+    "date": "date",
+    "listing_fields": "listing_fields",
+}
+
+
+class RatingCollection:
+    """
+    Coleção de RatingRecord em formato colunar.
+
+    Aceita as mesmas operações básicas de uma lista (len, iteração,
+    indexação, append/extend); os registros são materializados apenas
+    quando acessados.
+    """
+
+    def __init__(self, records=()):
+        self._categories = {d: [] for d in set(ENCODED_FIELDS.values())}
+        self._lookup = {d: {} for d in self._categories}
+        self._columns = {
+            name: array("i") if name in ENCODED_FIELDS else []
+            for name in FIELDS
+        }
+        self.extend(records)
+
+    @classmethod
+    def from_records(cls, records):
+        if isinstance(records, cls):
+            return records
+        return cls(records)
+
+    def _encode(self, domain, value):
+        lookup = self._lookup[domain]
+        code = lookup.get(value)
+
+        if code is None:
+            code = len(self._categories[domain])
+            self._categories[domain].append(value)
+            lookup[value] = code
+
+        return code
+
+    def append_row(self, row):
+        """
+        Adiciona uma linha na ordem de FIELDS, sem criar o RatingRecord.
+        """
+        # uma coluna a menos deixaria a coleção desalinhada
+        if len(row) != len(FIELDS):
+            raise ValueError(
+                f"Linha com {len(row)} campos; esperado {len(FIELDS)}."
+            )
+
+        for name, value in zip(FIELDS, row):
+            domain = ENCODED_FIELDS.get(name)
+            if domain is None:
+                self._columns[name].append(value)
+            else:
+                self._columns[name].append(self._encode(domain, value))
+
+    def append(self, record: RatingRecord):
+        self.append_row(tuple(getattr(record, name) for name in FIELDS))
+
+    def extend(self, records):
+        if isinstance(records, RatingCollection):
+            for row in records.rows():
+                self.append_row(row)
+            return
+
+        for record in records:
+            self.append(record)
+
+    def __len__(self):
+        return len(self._columns["link"])
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return self.take(np.arange(*i.indices(len(self))))
+        return RatingRecord(*self._row(i))
+
+    def __iter__(self):
+        for row in self.rows():
+            yield RatingRecord(*row)
+
+    def __eq__(self, other):
+        if not isinstance(other, RatingCollection):
+            return NotImplemented
+        return list(self.rows()) == list(other.rows())
+
+    def _row(self, i):
+        return tuple(
+            self._value(name, i) for name in FIELDS
+        )
+
+    def _value(self, name, i):
+        domain = ENCODED_FIELDS.get(name)
+        if domain is None:
+            return self._columns[name][i]
+        return self._categories[domain][self._columns[name][i]]
+
+    def rows(self):
+        """
+        Itera as linhas como tuplas na ordem de FIELDS.
+        """
+        return zip(*(self.column(name) for name in FIELDS))
+
+    def column(self, name):
+        """
+        Valores decodificados de um campo (lista de str).
+        """
+        domain = ENCODED_FIELDS.get(name)
+        if domain is None:
+            return list(self._columns[name])
+
+        categories = self._categories[domain]
+        return [categories[c] for c in self._columns[name]]
+
+    def codes(self, name):
+        """
+        Códigos inteiros de um campo codificado (sem cópia).
+        """
+        return self._columns[name]
+
+    def categories(self, name):
+        """
+        Categorias do domínio de um campo codificado; codes(name)[i]
+        indexa esta lista.
+        """
+        return self._categories[ENCODED_FIELDS[name]]
+
+    def filter(self, **criteria):
+        """
+        Nova coleção só com os registros que atendem a todos os critérios.
+        Cada critério é campo=valor ou campo=(valor1, valor2, ...).
+        """
+        mask = np.ones(len(self), dtype=bool)
+
+        for name, values in criteria.items():
+            if isinstance(values, str):
+                values = (values,)
+
+            domain = ENCODED_FIELDS.get(name)
+            if domain is None:
+                allowed = set(values)
+                mask &= np.fromiter(
+                    (v in allowed for v in self._columns[name]),
+                    dtype=bool,
+                    count=len(self),
+                )
+                continue
+
+            lookup = self._lookup[domain]
+            codes = [lookup[v] for v in values if v in lookup]
+            mask &= np.isin(np.asarray(self._columns[name]), codes)
+
+        return self.take(np.flatnonzero(mask))
+
+    def take(self, indices):
+        """
+        Nova coleção com as linhas `indices`, indexando os arrays de
+        códigos. Cada domínio é recompactado (np.unique) para conter só as
+        categorias usadas no subconjunto, que fica independente da coleção
+        original.
+        """
+        indices = np.asarray(indices, dtype=np.intp)
+
+        subset = RatingCollection()
+        taken = {}
+
+        for name in FIELDS:
+            column = self._columns[name]
+
+            if name in ENCODED_FIELDS:
+                taken[name] = np.asarray(column, dtype=np.intc)[indices]
+            else:
+                subset._columns[name] = [column[i] for i in indices.tolist()]
+
+        for domain in self._categories:
+            names = [n for n, d in ENCODED_FIELDS.items() if d == domain]
+
+            # campos do mesmo domínio são remapeados juntos
+            used, remapped = np.unique(
+                np.concatenate([taken[n] for n in names]),
+                return_inverse=True,
+            )
+            categories = self._categories[domain]
+            subset._categories[domain] = [categories[c] for c in used.tolist()]
+            subset._lookup[domain] = {
+                v: i for i, v in enumerate(subset._categories[domain])
+            }
+
+            remapped = remapped.astype(np.intc)
+            for i, name in enumerate(names):
+                codes = array("i")
+                codes.frombytes(
+                    remapped[i * len(indices):(i + 1) * len(indices)].tobytes()
+                )
+                subset._columns[name] = codes
+
+        return subset
+
+    def to_frame(self):
+        """
+        DataFrame com colunas categóricas montadas direto dos códigos,
+        sem converter cada registro em dict.
+        """
+        data = {}
+
+        for name in FIELDS:
+            domain = ENCODED_FIELDS.get(name)
+            if domain is None:
+                data[name] = self._columns[name]
+                continue
+
+            data[name] = pd.Categorical.from_codes(
+                np.asarray(self._columns[name]),
+                categories=self._categories[domain],
+            )
+
+        return pd.DataFrame(data, columns=list(FIELDS))
+
+    def to_dict(self):
+        """
+        Forma serializável (JSON) da coleção, mantendo a codificação.
+        """
+        return {
+            "categories": self._categories,
+            "columns": {
+                name: list(column) for name, column in self._columns.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        collection = cls()
+
+        for domain, values in data["categories"].items():
+            collection._categories[domain] = list(values)
+            collection._lookup[domain] = {
+                v: i for i, v in enumerate(values)
+            }
+
+        size = len(data["columns"]["link"])
+
+        for name in FIELDS:
+            values = data["columns"].get(name)
+
+            # coluna adicionada depois que os dados foram salvos
+            if values is None:
+                domain = ENCODED_FIELDS.get(name)
+                default = ""
+                if domain is not None:
+                    default = collection._encode(domain, "")
+                values = [default] * size
+
+            if name in ENCODED_FIELDS:
+                collection._columns[name] = array("i", values)
+            else:
+                collection._columns[name] = list(values)
+
+        return collection
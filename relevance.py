@@ -0,0 +1,222 @@
+"""
+Pre-fetch relevance filter: decides from the listing title alone whether a
+rating action refers to a debt issuance (ignored) or to an issuer (kept).
+
+Run directly to check which keyword excludes each title:
+
+    python relevance.py "Fitch Afirma Rating da 1ª Emissão de Debêntures da X"
+    python relevance.py < titulos.txt
+    python relevance.py --compare [títulos...]
+
+--compare mostra, lado a lado, o resultado das listas de substrings antigas
+e dos matchers atuais, para que regressões de casamento fiquem visíveis.
+"""
+
+from collections import Counter
+import unicodedata
+import sys
+import re
+
+
+ISSUANCE_KEYWORDS = [
+    "debenture",
+    "issuance",
+    "bond",
+    "note",
+    "nota",
+    "emissao",
+    "emissoes",
+    "cri",
+    "cra",
+    "fidc",
+    "cota",
+]
+
+DEBT_ENTITY_KEYWORDS = [
+    "/",
+    "bond",
+    "note",
+    "nota",
+    "debenture",
+    "senior",
+    "unsecured",
+    "secured",
+    "emissao",
+    "emissoes",
+    "emission",
+]
+
+
+def normalize(text: str) -> str:
+    """
+    Minúsculas e sem acentos ("Debênture" -> "debenture").
+    """
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return stripped.lower()
+
+
+class KeywordMatcher:
+    """
+    Todas as palavras-chave compiladas em uma única regex, casando apenas
+    palavras inteiras (com plural opcional em "s" ou "es", como em
+    "seniores"), de modo que "cri" não case dentro de "crise" nem "note"
+    dentro de "notável".
+    """
+
+    def __init__(self, keywords):
+        self.keywords = tuple(keywords)
+
+        alternatives = []
+        # mais longas primeiro, para reportar a palavra mais específica
+        for k in sorted({normalize(k) for k in keywords}, key=len,
+                        reverse=True):
+            word = re.match(r"\w", k[0]) and re.match(r"\w", k[-1])
+            if word:
+                alternatives.append(rf"(?<!\w){re.escape(k)}(?:e?s)?(?!\w)")
+            else:
+                alternatives.append(re.escape(k))
+
+        self._pattern = re.compile("|".join(alternatives))
+        self._normalized = {normalize(k): k for k in keywords}
+
+    def find(self, text: str) -> str:
+        """
+        Retorna a palavra-chave que casou no texto, ou "" se nenhuma.
+        """
+        m = self._pattern.search(normalize(text))
+        if not m:
+            return ""
+
+        return self._canonical(m.group(0))
+
+    def find_all(self, text: str):
+        return [
+            self._canonical(m.group(0))
+            for m in self._pattern.finditer(normalize(text))
+        ]
+
+    def _canonical(self, matched: str) -> str:
+        if matched in self._normalized:
+            return self._normalized[matched]
+
+        # plural: "notes" -> "note", "seniores" -> "senior"
+        for plural in ("s", "es"):
+            singular = matched[:-len(plural)]
+            if matched.endswith(plural) and singular in self._normalized:
+                return self._normalized[singular]
+
+        return matched
+
+
+ISSUANCE_MATCHER = KeywordMatcher(ISSUANCE_KEYWORDS)
+DEBT_ENTITY_MATCHER = KeywordMatcher(DEBT_ENTITY_KEYWORDS)
+
+# filtros por substring usados antes do KeywordMatcher, só para --compare
+LEGACY_ISSUANCE_KEYWORDS = [
+    "debenture", "debênture", "issuance", "bond", "note", "emissão",
+    "cri", "cra", "fidc", "cotas",
+]
+LEGACY_DEBT_ENTITY_KEYWORDS = [
+    "/", "bond", "note", "debenture", "debênture", "senior", "unsecured",
+    "secured", "notes", "emissão", "emission", "debentures",
+]
+
+# títulos da listagem e entidades das tabelas de rating reais
+COMPARE_SAMPLES = [
+    ("título", "Fitch Afirma Rating 'AA(bra)' da Empresa X S.A.; "
+               "Perspectiva Estável"),
+    ("título", "Fitch Afirma Rating da 1ª Emissão de Debêntures da "
+               "Empresa X S.A."),
+    ("título", "Fitch Atribui Rating 'AAA(bra)' às Notas Comerciais da "
+               "Empresa X"),
+    ("título", "Fitch Atribui Rating às Cotas Seniores do FIDC Y"),
+    ("título", "Fitch Rebaixa Rating de CRI da 45ª Série da Securitizadora Z"),
+    ("título", "Fitch Coloca Rating da Crise Participações em Observação"),
+    ("título", "Fitch Eleva Rating da Notável Energia para 'A+(bra)'"),
+    ("entidade", "Empresa X S.A."),
+    ("entidade", "Notas Seniores"),
+    ("entidade", "Cotas Seniores"),
+    ("entidade", "Senior Unsecured Notes"),
+    ("entidade", "Debêntures 2ª Emissão"),
+    ("entidade", "BRL 500 mln debentures/2029"),
+    ("entidade", "Crise Participações S.A."),
+]
+
+
+def explain(titles, matcher=ISSUANCE_MATCHER):
+    """
+    Para cada título, indica se seria ignorado e por quais palavras.
+    Retorna também a contagem de títulos ignorados por palavra-chave.
+    """
+    results = []
+    counts = Counter()
+
+    for title in titles:
+        matches = matcher.find_all(title)
+        if matches:
+            counts[matches[0]] += 1
+        results.append((title, matches))
+
+    return results, counts
+
+
+def legacy_find(text: str, keywords) -> str:
+    """
+    Primeira substring antiga contida no texto, ou "" se nenhuma.
+    """
+    lower = text.lower()
+    return next((k for k in keywords if k in lower), "")
+
+
+def compare(samples=COMPARE_SAMPLES):
+    """
+    Linhas (tipo, texto, resultado antigo, resultado atual); tipo é
+    "título" (filtro de emissões) ou "entidade" (filtro de dívidas).
+    """
+    rows = []
+
+    for kind, text in samples:
+        if kind == "título":
+            legacy = legacy_find(text, LEGACY_ISSUANCE_KEYWORDS)
+            current = ISSUANCE_MATCHER.find(text)
+        else:
+            legacy = legacy_find(text, LEGACY_DEBT_ENTITY_KEYWORDS)
+            current = DEBT_ENTITY_MATCHER.find(text)
+        rows.append((kind, text, legacy, current))
+
+    return rows
+
+
+def print_comparison(rows):
+    print(f"{'tipo':<9} {'antigo':<11} {'atual':<11} texto")
+
+    for kind, text, legacy, current in rows:
+        flag = "" if bool(legacy) == bool(current) else "  <- mudou"
+        print(f"{kind:<9} {legacy or '-':<11} {current or '-':<11} "
+              f"{text}{flag}")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--compare"]:
+        texts = sys.argv[2:]
+        print_comparison(compare(
+            [("título", t) for t in texts] if texts else COMPARE_SAMPLES
+        ))
+        sys.exit()
+
+    titles = sys.argv[1:] or [line.strip() for line in sys.stdin]
+    titles = [t for t in titles if t]
+
+    results, counts = explain(titles)
+
+    for title, matches in results:
+        if matches:
+            print(f"IGNORADO [{', '.join(matches)}] {title}")
+        else:
+            print(f"MANTIDO {title}")
+
+    print()
+    print(f"{sum(counts.values())} de {len(titles)} títulos ignorados.")
+    for keyword, count in counts.most_common():
+        print(f"  {keyword}: {count}")
@@ -1,12 +1,27 @@
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, CancelledError
 from dataclasses import dataclass, asdict
+from itertools import product
 from typing import List
+from urllib.parse import urlencode
 from playwright.sync_api import sync_playwright, Page, TimeoutError
+import argparse
 import re
 import logging
 import shutil
+import time
 import sys
 import os
 
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+from records import RatingRecord, RatingCollection
+from issuer_index import normalize_issuer
+from relevance import ISSUANCE_MATCHER, DEBT_ENTITY_MATCHER
+
 
 logging.basicConfig(
     level=logging.INFO,
@@ -14,38 +29,70 @@ logging.basicConfig(
 )
 
 
-SEARCH_URL = (
-    "https://www.fitchratings.com/search?"
-    "dateValue=lastWeek&expanded=racs&filter.sector=&"
-    "filter.language=Portuguese&filter.region=&"
-    "filter.country=&filter.reportType=Rating+Action+Commentary&"
-    "filter.topic=&viewType=data"
-)
+SEARCH_BASE_URL = "https://www.fitchratings.com/search?"
 
 
-@dataclass
-class RatingRecord:
-    agency: str
-    company: str
-    rating_current: str
-    rating_previous: str
-    outlook_current: str
-    outlook_previous: str
-    action: str
-    date: str
-    link: str
+@dataclass(frozen=True)
+class SearchQuery:
+    language: str = "Portuguese"
+    report_type: str = "Rating Action Commentary"
+    sector: str = ""
+    region: str = ""
+    country: str = ""
+    topic: str = ""
+    date_value: str = "lastWeek"
+
+    def url(self) -> str:
+        # a ordem dos parâmetros segue a URL usada pelo próprio site
+        return SEARCH_BASE_URL + urlencode([
+            ("dateValue", self.date_value),
+            ("expanded", "racs"),
+            ("filter.sector", self.sector),
+            ("filter.language", self.language),
+            ("filter.region", self.region),
+            ("filter.country", self.country),
+            ("filter.reportType", self.report_type),
+            ("filter.topic", self.topic),
+            ("viewType", "data"),
+        ])
+
+
+SEARCH_URL = SearchQuery().url()
+
+
+def build_queries(languages=("Portuguese",),
+                  regions=("",),
+                  sectors=("",),
+                  report_types=("Rating Action Commentary",),
+                  date_value="lastWeek") -> List[SearchQuery]:
+    """
+    Gera uma SearchQuery para cada combinação de filtros.
+    """
+    return [
+        SearchQuery(
+            language=language,
+            region=region,
+            sector=sector,
+            report_type=report_type,
+            date_value=date_value,
+        )
+        for language, region, sector, report_type in product(
+            languages, regions, sectors, report_types
+        )
+    ]
 
 
 def clean_text(text: str) -> str:
     return re.sub(r"\s+", " ", text).strip()
 
 
-def load_result_rows(page: Page):
+def load_result_rows(page: Page, url: str = SEARCH_URL, should_cancel=None):
     logging.info("Abrindo página de busca...")
-    page.goto(SEARCH_URL, timeout=60000)
+
+    goto(page, url, should_cancel=should_cancel)
 
     # espera container principal
-    page.wait_for_selector(".frw-column__main")
+    wait_for_selector(page, ".frw-column__main", should_cancel=should_cancel)
 
     rows = page.locator(
         ".frw-column__main > .frw-article-data"
@@ -56,24 +103,14 @@ def load_result_rows(page: Page):
     return rows
 
 
-def extract_basic_rows(page: Page):
-    rows = load_result_rows(page)
+def extract_basic_rows(page: Page, url: str = SEARCH_URL,
+                       should_cancel=None):
+    rows = load_result_rows(page, url, should_cancel)
 
     data = []
     total = rows.count()
 
-    EMISSAO_KEYWORDS = [
-        "debenture",
-        "debênture",
-        "issuance",
-        "bond",
-        "note",
-        "emissão",
-        "cri",
-        "cra",
-        "fidc",
-        "cotas"
-    ]
+    skipped = Counter()
 
     for i in range(1, total):
         try:
@@ -86,11 +123,13 @@ def extract_basic_rows(page: Page):
             if link_locator.count() == 0:
                 continue
 
-            title = link_locator.first.inner_text().lower()
+            title = clean_text(link_locator.first.inner_text())
 
-            # ignora emissões
-            if any(k in title for k in EMISSAO_KEYWORDS):
-                logging.info(f"Ignorado (emissão): {title}")
+            # ignora emissões antes de abrir qualquer página
+            keyword = ISSUANCE_MATCHER.find(title)
+            if keyword:
+                skipped[keyword] += 1
+                logging.info(f"Ignorado (emissão: {keyword}): {title}")
                 continue
 
             link = link_locator.first.get_attribute("href")
@@ -104,16 +143,132 @@ def extract_basic_rows(page: Page):
 
             data.append({
                 "date": date,
-                "link": f"https://www.fitchratings.com{link}"
+                "link": f"https://www.fitchratings.com{link}",
+                "title": title,
             })
 
         except Exception as e:
             logging.exception(f"Erro linha {i}: {e}")
 
-    logging.info(f"{len(data)} links coletados.")
+    logging.info(
+        f"{len(data)} links coletados, "
+        f"{sum(skipped.values())} páginas evitadas {dict(skipped)}."
+    )
     return data
 
 
+def link_key(link: str) -> str:
+    # mesma RAC pode aparecer com query string ou barra final diferentes
+    return link.split("?")[0].split("#")[0].rstrip("/")
+
+
+def merge_rows(row_sets):
+    """
+    Junta as listagens de várias buscas, removendo links repetidos entre
+    elas e preservando a ordem de chegada.
+    """
+    merged = []
+    seen = set()
+
+    for rows in row_sets:
+        for row in rows:
+            key = link_key(row["link"])
+            if key in seen:
+                continue
+
+            seen.add(key)
+            merged.append(row)
+
+    return merged
+
+
+def _collect_query_rows(query: SearchQuery, record_har=None,
+                        replay_har=None, should_cancel=None):
+    if should_cancel and should_cancel():
+        raise ScrapeCancelled()
+
+    # cada thread precisa da sua própria instância do Playwright
+    with sync_playwright() as p:
+        browser = launch_browser(p)
+        try:
+            context = new_context(browser, record_har, replay_har)
+            try:
+                page = context.new_page()
+                return extract_basic_rows(page, query.url(), should_cancel)
+            finally:
+                # o HAR só é gravado ao fechar o contexto, mesmo com erro
+                context.close()
+        finally:
+            browser.close()
+
+
+def collect_rows(queries, max_workers=4, record_har=None, replay_har=None,
+                 should_cancel=None):
+    """
+    Executa as buscas em paralelo e devolve a união deduplicada dos links.
+    Com record_har/replay_har, cada busca usa seu próprio arquivo
+    (<nome>.query<i>.har).
+    should_cancel: se retornar True, as buscas restantes não são feitas e
+    devolve os links já coletados.
+    """
+    queries = list(dict.fromkeys(queries))
+    row_sets = []
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(
+                _collect_query_rows,
+                q,
+                har_path_for(record_har, f"query{i}"),
+                har_path_for(replay_har, f"query{i}"),
+                should_cancel,
+            )
+            for i, q in enumerate(queries)
+        ]
+
+        for query, future in zip(queries, futures):
+            if should_cancel and should_cancel():
+                # buscas ainda na fila nem começam
+                for f in futures:
+                    f.cancel()
+
+            try:
+                row_sets.append(future.result())
+            except (ScrapeCancelled, CancelledError):
+                logging.info(f"Busca cancelada: {query.url()}")
+            except Exception:
+                logging.exception(f"Erro na busca: {query.url()}")
+
+    return _merge_query_rows(row_sets, len(queries))
+
+
+def collect_rows_on_page(page, queries, should_cancel=None):
+    """
+    Executa as buscas em sequência numa página já aberta (Page ou
+    PageRecycler), sem lançar navegadores; usado pelo modo serviço, que
+    mantém o navegador entre os ticks. Uma busca que falha interrompe a
+    coleta: uma listagem parcial não deve ser tratada como completa.
+    """
+    queries = list(dict.fromkeys(queries))
+    row_sets = [
+        extract_basic_rows(current_page(page), q.url(), should_cancel)
+        for q in queries
+    ]
+
+    return _merge_query_rows(row_sets, len(queries))
+
+
+def _merge_query_rows(row_sets, n_queries):
+    rows = merge_rows(row_sets)
+    total = sum(len(r) for r in row_sets)
+
+    logging.info(
+        f"{len(rows)} links únicos em {n_queries} buscas "
+        f"({total - len(rows)} repetidos)."
+    )
+    return rows
+
+
 def extract_agency(text: str) -> str:
     """
     Identifica a agência a partir do texto.
@@ -141,13 +296,69 @@ def extract_agency(text: str) -> str:
     return "-"
 
 
-def parse_action_page(page: Page, url: str, date: str) -> RatingRecord:
+class ScrapeCancelled(Exception):
+    pass
+
+
+def goto(page: Page, url: str, timeout=60000, should_cancel=None,
+         step=5000):
+    """
+    page.goto interrompível: com should_cancel, cada tentativa tem timeout
+    de `step` ms e só espera o início da resposta ("commit"); o
+    cancelamento é verificado entre as tentativas, até `timeout` ms no
+    total. A espera pelo conteúdo fica com wait_for_selector.
+    """
+    if should_cancel is None:
+        page.goto(url, timeout=timeout)
+        return
+
+    waited = 0
+    while True:
+        if should_cancel():
+            raise ScrapeCancelled()
+
+        try:
+            page.goto(url, timeout=step, wait_until="commit")
+            return
+        except TimeoutError:
+            waited += step
+            if waited >= timeout:
+                raise
+            logging.info(f"Sem resposta em {step} ms, tentando de novo: {url}")
+
+
+def wait_for_selector(page: Page, selector: str, timeout=30000,
+                      should_cancel=None, step=500):
+    """
+    page.wait_for_selector em fatias de `step` ms, verificando o
+    cancelamento entre elas.
+    """
+    if should_cancel is None:
+        page.wait_for_selector(selector, timeout=timeout)
+        return
+
+    waited = 0
+    while True:
+        if should_cancel():
+            raise ScrapeCancelled()
+
+        try:
+            page.wait_for_selector(selector, timeout=step)
+            return
+        except TimeoutError:
+            waited += step
+            if waited >= timeout:
+                raise
+
+
+def parse_action_page(page: Page, url: str, date: str,
+                      should_cancel=None) -> RatingRecord:
     logging.info(f"Abrindo ação: {url}")
 
-    page.goto(url, timeout=60000)
+    goto(page, url, should_cancel=should_cancel)
 
     # espera conteúdo principal
-    page.wait_for_selector(".frw-RAC")
+    wait_for_selector(page, ".frw-RAC", should_cancel=should_cancel)
 
     raw_text = page.locator(".frw-RAC").inner_text()
     text = clean_text(raw_text)
@@ -231,6 +442,10 @@ def extract_company_from_title(page: Page) -> str:
     except:
         return ""
 
+    return parse_company_from_title(title)
+
+
+def parse_company_from_title(title: str) -> str:
     title = clean_text(title)
 
     patterns = [
@@ -268,6 +483,45 @@ def extract_company_from_title(page: Page) -> str:
     return ""
 
 
+# no título da listagem o nome vai até o fim da frase; não para no "." de
+# "S.A." como parse_company_from_title
+LISTING_COMPANY_PATTERNS = [
+    r"ratings?(?:\s+(?:nacionais?|de\s+longo\s+prazo|[‘'][^’']*[’']))*"
+    r"\s+d[aoe]s?\s+(.+)",
+    r"(?:affirms|upgrades|downgrades|assigns|places|revises|publishes)"
+    r"\s+(.+)",
+]
+
+LISTING_COMPANY_END = (
+    r";|\s+(?:para|to|at)\s+"
+    r"|\s+(?:em|de|on)\s+(?=[‘'\"“]|observa|rating watch)"
+)
+
+
+def parse_company_from_listing_title(title: str) -> str:
+    """
+    "Fitch Rebaixa Rating da Empresa X S.A. de 'A(bra)' para ..."
+    -> "Empresa X S.A."
+    """
+    title = clean_text(title)
+
+    for p in LISTING_COMPANY_PATTERNS:
+        m = re.search(p, title, re.IGNORECASE)
+        if not m:
+            continue
+
+        company = re.split(LISTING_COMPANY_END, m.group(1),
+                           maxsplit=1, flags=re.IGNORECASE)[0]
+        company = clean_text(company).rstrip(",")
+
+        if re.search(r"emiss[aã]o|deb[eê]nture", company, re.I):
+            return ""
+
+        return company
+
+    return ""
+
+
 def extract_ratings(text: str):
     change = re.search(
         r"de\s+[‘']?([A-Za-z+\-]+\(bra\))[’']?\s+para\s+[‘']?([A-Za-z+\-]+\(bra\))[’']?",
@@ -309,15 +563,8 @@ def extract_entity_and_ratings_from_table(page: Page):
         rating_cell = clean_text(cells.nth(1).inner_text())
         prior_cell = clean_text(cells.nth(2).inner_text())
 
-        entity_lower = entity.lower()
-
         # ignora dívidas
-        if any(k in entity_lower for k in [
-            "/", "bond", "note", "debenture",
-            "debênture", "senior", "unsecured",
-            "secured", "notes", "emissão",
-            "emission", "debentures"
-        ]):
+        if DEBT_ENTITY_MATCHER.find(entity):
             continue
 
         rating_match = re.search(
@@ -362,6 +609,69 @@ def extract_outlook(text: str):
     return prev, curr
 
 
+def extract_action_from_title(title: str) -> str:
+    lower = title.lower()
+
+    if re.search(r"\b(afirma|affirms?)\b", lower):
+        return "Afirmado"
+    if re.search(r"\b(eleva|upgrades?)\b", lower):
+        return "Upgrade"
+    if re.search(r"\b(rebaixa|downgrades?)\b", lower):
+        return "Downgrade"
+    if re.search(r"\b(atribui|assigns?)\b", lower):
+        return "Novo Rating"
+
+    return ""
+
+
+LISTING_REQUIRED_FIELDS = ("company", "rating_current")
+
+
+def record_from_listing(row, required=LISTING_REQUIRED_FIELDS):
+    """
+    Monta um RatingRecord provisório só com o título e a data da listagem,
+    sem abrir a página. Retorna None se faltar algum campo obrigatório.
+    `listing_fields` indica quais campos vieram do título.
+    """
+    title = row.get("title", "")
+    if not title:
+        return None
+
+    rating_prev, rating_curr = extract_ratings(title)
+    outlook_prev, outlook_curr = extract_outlook(title)
+
+    values = {
+        "agency": extract_agency(title),
+        "company": parse_company_from_listing_title(title),
+        "rating_current": rating_curr,
+        "rating_previous": rating_prev,
+        "outlook_current": outlook_curr,
+        "outlook_previous": outlook_prev,
+        "action": extract_action_from_title(title),
+    }
+
+    if values["agency"] == "-":
+        values["agency"] = ""
+
+    if any(not values[f] for f in required):
+        return None
+
+    found = [name for name, value in values.items() if value]
+
+    return RatingRecord(
+        agency=values["agency"] or "-",
+        company=values["company"],
+        rating_current=values["rating_current"],
+        rating_previous=values["rating_previous"],
+        outlook_current=values["outlook_current"],
+        outlook_previous=values["outlook_previous"],
+        action=values["action"] or "Outro",
+        date=row["date"],
+        link=row["link"],
+        listing_fields=",".join(found),
+    )
+
+
 def extract_action(text: str) -> str:
     lower = text.lower()
 
@@ -415,75 +725,505 @@ def get_chromium_path():
 # ----------------------------
 # EXECUÇÃO
 # ----------------------------
-def run_scraper() -> List[RatingRecord]:
-    records = []
-    seen_links = set()
-    seen_records = set()
+def launch_browser(p):
+    # browser = p.chromium.launch(headless=True)
+    browser_path = get_chromium_path()
+
+    # processos que já existiam: o que surgir no launch é deste navegador
+    before = _process_children()
+
+    if browser_path:
+        browser = p.chromium.launch(
+            headless=True,
+            executable_path=browser_path,
+            args=["--disable-gpu"]
+        )
+    else:
+        browser = p.chromium.launch(
+            headless=True,
+            args=["--disable-gpu"]
+        )
 
-    with sync_playwright() as p:
-        # browser = p.chromium.launch(headless=True)
-        browser_path = get_chromium_path()
-
-        if browser_path:
-            browser = p.chromium.launch(
-                headless=True,
-                executable_path=browser_path,
-                args=["--disable-gpu"]
+    _register_browser_pids(browser, before)
+    return browser
+
+
+def har_path_for(path, suffix):
+    if not path:
+        return None
+
+    base, ext = os.path.splitext(path)
+    return f"{base}.{suffix}{ext}"
+
+
+def new_context(browser, record_har=None, replay_har=None):
+    """
+    Cria o contexto do navegador.
+
+    record_har: grava todo o tráfego (busca e páginas de ação) nesse HAR.
+    replay_har: responde todas as requisições a partir desse HAR, sem
+    acesso à rede; o que não estiver no arquivo é abortado.
+    """
+    if record_har and replay_har:
+        raise ValueError("Use record_har ou replay_har, não ambos.")
+
+    if record_har:
+        os.makedirs(os.path.dirname(record_har) or ".", exist_ok=True)
+        logging.info(f"Gravando tráfego em {record_har}")
+        return browser.new_context(
+            record_har_path=record_har,
+            record_har_mode="full",
+        )
+
+    context = browser.new_context()
+
+    if replay_har:
+        if not os.path.exists(replay_har):
+            raise FileNotFoundError(f"HAR não encontrado: {replay_har}")
+
+        logging.info(f"Reproduzindo tráfego de {replay_har}")
+        context.route_from_har(replay_har, not_found="abort")
+
+    return context
+
+
+# id(browser) -> (pids do Chromium principal, pids do driver que o lançou)
+_BROWSER_PIDS = {}
+
+
+def _process_children():
+    """
+    Árvore de processos como {ppid: [pid, ...]}, via psutil ou /proc
+    (Linux). None se não for possível listar nesta plataforma.
+    """
+    children = {}
+
+    if psutil is not None:
+        for proc in psutil.process_iter(["pid", "ppid"]):
+            children.setdefault(proc.info["ppid"], []).append(
+                proc.info["pid"]
             )
-        else:
-            browser = p.chromium.launch(
-                headless=True,
-                args=["--disable-gpu"]
+        return children
+
+    if not os.path.isdir("/proc"):
+        return None
+
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # o nome pode conter espaços; o ppid vem após o ")"
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+
+    return children
+
+
+def _descendant_pids(pid, children):
+    pids = []
+    stack = list(children.get(pid, []))
+    while stack:
+        p = stack.pop()
+        pids.append(p)
+        stack.extend(children.get(p, []))
+
+    return pids
+
+
+def _register_browser_pids(browser, before):
+    """
+    Guarda o processo principal do Chromium recém-lançado (o que surgiu
+    sob o processo Python e cujo pai já existia, isto é, o driver do
+    Playwright) e o driver, para browser_rss_mb medir só essa árvore.
+    """
+    after = _process_children()
+    if before is None or after is None:
+        return
+
+    me = os.getpid()
+    new = set(_descendant_pids(me, after)) - set(_descendant_pids(me, before))
+    parent = {pid: ppid for ppid, kids in after.items() for pid in kids}
+
+    roots = [pid for pid in new if parent.get(pid) not in new]
+    drivers = {parent[pid] for pid in roots if parent.get(pid) != me}
+
+    _BROWSER_PIDS[id(browser)] = (roots, drivers)
+
+
+def _rss_bytes(pid):
+    if psutil is not None:
+        try:
+            return psutil.Process(pid).memory_info().rss
+        except psutil.Error:
+            return 0
+
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+
+    return 0
+
+
+def browser_rss_mb(browser):
+    """
+    RSS somado do driver do Playwright e da árvore de processos deste
+    navegador (Chromium e seus renderers), em MB. Outros processos filhos
+    (QtWebEngine, navegadores de outras buscas) não entram. None se não for
+    possível medir nesta plataforma.
+    """
+    pids = _BROWSER_PIDS.get(id(browser))
+    children = _process_children()
+    if pids is None or children is None:
+        return None
+
+    roots, drivers = pids
+    tree = set(roots) | set(drivers)
+    for pid in roots:
+        tree.update(_descendant_pids(pid, children))
+
+    return sum(_rss_bytes(pid) for pid in tree) / 2**20
+
+
+DEFAULT_MAX_NAVIGATIONS = 50
+RSS_CHECK_EVERY = 10
+
+
+class PageRecycler:
+    """
+    Fornece a página usada nas navegações e a recicla após
+    `max_navigations` navegações ou quando o RSS do navegador passa de
+    `max_rss_mb`, mantendo memória e latência estáveis em execuções longas.
+
+    Recicla o contexto inteiro; ao gravar HAR, recicla só a página, pois
+    o HAR pertence ao contexto.
+    """
+
+    def __init__(self, browser, record_har=None, replay_har=None,
+                 max_navigations=DEFAULT_MAX_NAVIGATIONS, max_rss_mb=None):
+        self.browser = browser
+        self.record_har = record_har
+        self.replay_har = replay_har
+        self.max_navigations = max_navigations
+        self.max_rss_mb = max_rss_mb
+
+        # um dict por ciclo: navegações, RSS ao reciclar, s/página
+        self.cycles = []
+
+        self.context = new_context(browser, record_har, replay_har)
+        self.page = self.context.new_page()
+        self._start_cycle()
+
+    def _start_cycle(self):
+        self.navigations = 0
+        self.cycle_started = time.monotonic()
+
+    def _should_recycle(self) -> bool:
+        if self.max_navigations and self.navigations >= self.max_navigations:
+            return True
+
+        if (self.max_rss_mb and self.navigations
+                and self.navigations % RSS_CHECK_EVERY == 0):
+            rss = browser_rss_mb(self.browser)
+            if rss is not None and rss > self.max_rss_mb:
+                logging.info(f"RSS do navegador em {rss:.0f} MB.")
+                return True
+
+        return False
+
+    def get_page(self) -> Page:
+        """
+        Página para a próxima navegação (reciclada se necessário).
+        """
+        if self._should_recycle():
+            self.recycle()
+
+        self.navigations += 1
+        return self.page
+
+    def _record_cycle(self, label):
+        elapsed = time.monotonic() - self.cycle_started
+        rss = browser_rss_mb(self.browser)
+
+        cycle = {
+            "navigations": self.navigations,
+            "rss_mb": rss,
+            "seconds_per_page":
+                elapsed / self.navigations if self.navigations else 0.0,
+        }
+        self.cycles.append(cycle)
+
+        logging.info(
+            f"{label} (ciclo {len(self.cycles)}): "
+            f"{cycle['navigations']} navegações, "
+            f"RSS {'?' if rss is None else f'{rss:.0f}'} MB, "
+            f"{cycle['seconds_per_page']:.2f}s/página"
+        )
+
+    def recycle(self):
+        self._record_cycle("Reciclando página")
+
+        self.page.close()
+
+        if not self.record_har:
+            self.context.close()
+            self.context = new_context(
+                self.browser,
+                replay_har=self.replay_har,
             )
 
-        page = browser.new_page()
+        self.page = self.context.new_page()
+        self._start_cycle()
 
-        rows = extract_basic_rows(page)
+    def close(self):
+        # o último ciclo também entra nas métricas
+        if self.navigations:
+            self._record_cycle("Fechando página")
 
-        for row in rows:
-            link = row["link"]
+        # fechar o contexto grava o HAR, quando houver
+        self.context.close()
 
-            # evita processar link duplicado
-            if link in seen_links:
-                logging.info(f"Link duplicado ignorado: {link}")
-                continue
 
-            seen_links.add(link)
+def record_key(record: RatingRecord, issuer_index=None):
+    # emissor pela chave normalizada: "X S.A." e "X S/A" são o mesmo
+    if issuer_index is not None:
+        issuer = issuer_index.key(record.company)
+    else:
+        issuer = normalize_issuer(record.company)
+
+    return (
+        issuer,
+        record.rating_current,
+        record.action,
+    )
+
+
+@dataclass
+class ScrapeProgress:
+    found: int
+    # registros aceitos
+    fetched: int = 0
+    # páginas de ação efetivamente carregadas
+    opened: int = 0
+    skipped: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def done(self) -> int:
+        return self.fetched + self.skipped
+
+    @property
+    def eta(self) -> float:
+        """
+        Segundos restantes estimados pela latência média observada.
+        """
+        if not self.done:
+            return 0.0
+        return self.elapsed / self.done * (self.found - self.done)
+
+
+def current_page(page) -> Page:
+    if isinstance(page, PageRecycler):
+        return page.get_page()
+    return page
+
+
+def scrape_rows(page, rows, seen_records=None, progress=None,
+                should_cancel=None, on_record=None,
+                fast=False, issuer_index=None,
+                failed_links=None) -> List[RatingRecord]:
+    """
+    Abre cada ação listada em `rows` e devolve os registros válidos.
+    `page` pode ser uma Page ou um PageRecycler.
+    `seen_records` permite deduplicar contra registros já coletados
+    (chaves de record_key).
+    issuer_index: IssuerIndex usado na deduplicação; cada grafia de
+    emissor encontrada é registrada nele.
+    failed_links: se informado, recebe os links cuja extração falhou.
+
+    fast: monta os registros a partir dos títulos da listagem e só abre a
+    página quando faltam campos obrigatórios (ver record_from_listing).
+
+    progress: chamado com um ScrapeProgress após cada link.
+    should_cancel: se retornar True, interrompe e devolve o que já foi
+    coletado.
+    on_record: chamado com cada registro aceito, assim que extraído.
+    """
+    records = []
+    seen_links = set()
+
+    if seen_records is None:
+        seen_records = set()
+
+    status = ScrapeProgress(found=len(rows))
+    started = time.monotonic()
+
+    def skip(message):
+        logging.info(message)
+        status.skipped += 1
+
+    for row in rows:
+        if should_cancel and should_cancel():
+            logging.info("Execução cancelada.")
+            break
+
+        link = row["link"]
+
+        # evita processar link duplicado
+        if link_key(link) in seen_links:
+            skip(f"Link duplicado ignorado: {link}")
+
+        else:
+            seen_links.add(link_key(link))
 
             try:
-                record = parse_action_page(
-                    page,
-                    link,
-                    row["date"]
-                )
+                record = record_from_listing(row) if fast else None
+
+                if record is None:
+                    record = parse_action_page(
+                        current_page(page),
+                        link,
+                        row["date"],
+                        should_cancel,
+                    )
+                    status.opened += 1
+                else:
+                    logging.info(f"Registro da listagem: {link}")
+
+                key = record_key(record, issuer_index)
+
+                # registra também as grafias dos registros duplicados
+                if issuer_index is not None and record.company:
+                    issuer_index.add(record.company)
+
                 # ignora registros sem empresa válida
                 if not record.company:
-                    logging.info("Registro sem empresa ignorado.")
-                    continue
+                    skip("Registro sem empresa ignorado.")
 
-                record_key = (
-                    record.company,
-                    record.rating_current,
-                    record.action,
-                )
+                elif key in seen_records:
+                    skip("Registro duplicado ignorado.")
 
-                if record_key in seen_records:
-                    logging.info("Registro duplicado ignorado.")
-                    continue
+                else:
+                    status.fetched += 1
+                    seen_records.add(key)
+                    records.append(record)
 
-                seen_records.add(record_key)
-                records.append(record)
+                    if on_record:
+                        on_record(record)
+
+            except ScrapeCancelled:
+                logging.info("Execução cancelada.")
+                break
 
             except Exception:
                 logging.warning("Registro ignorado.")
+                status.skipped += 1
+
+                if failed_links is not None:
+                    failed_links.add(link)
 
-        browser.close()
+        status.elapsed = time.monotonic() - started
+        if progress:
+            progress(status)
 
     return records
 
 
+def run_scraper(queries=None, record_har=None, replay_har=None,
+                progress=None, should_cancel=None, on_record=None,
+                fast=False, issuer_index=None,
+                max_navigations=DEFAULT_MAX_NAVIGATIONS,
+                max_rss_mb=None) -> RatingCollection:
+    """
+    queries: lista opcional de SearchQuery; sem ela usa SEARCH_URL.
+    record_har: grava todo o tráfego da execução nesse arquivo HAR.
+    replay_har: reexecuta a partir de um HAR gravado, sem rede.
+    progress, should_cancel, on_record, fast, issuer_index: repassados a
+    scrape_rows; o índice é salvo ao final.
+    max_navigations, max_rss_mb: limites de reciclagem da página
+    (ver PageRecycler).
+    """
+    rows = None
+    if queries:
+        rows = collect_rows(
+            queries,
+            record_har=record_har,
+            replay_har=replay_har,
+            should_cancel=should_cancel,
+        )
+
+    with sync_playwright() as p:
+        browser = launch_browser(p)
+        recycler = PageRecycler(
+            browser,
+            record_har,
+            replay_har,
+            max_navigations=max_navigations,
+            max_rss_mb=max_rss_mb,
+        )
+
+        try:
+            if rows is None:
+                try:
+                    rows = extract_basic_rows(
+                        recycler.get_page(),
+                        should_cancel=should_cancel,
+                    )
+                except ScrapeCancelled:
+                    logging.info("Execução cancelada.")
+                    rows = []
+
+            records = scrape_rows(
+                recycler,
+                rows,
+                progress=progress,
+                should_cancel=should_cancel,
+                on_record=on_record,
+                fast=fast,
+                issuer_index=issuer_index,
+            )
+        finally:
+            # fecha o contexto (e grava o HAR) também quando há erro
+            recycler.close()
+            browser.close()
+
+    if issuer_index is not None:
+        issuer_index.save()
+
+    return RatingCollection(records)
+
+
 if __name__ == "__main__":
-    data = run_scraper()
+    parser = argparse.ArgumentParser(
+        description="Coleta as ações de rating publicadas."
+    )
+    parser.add_argument(
+        "--record-har",
+        help="grava o tráfego da execução nesse arquivo HAR",
+    )
+    parser.add_argument(
+        "--replay-har",
+        help="reexecuta a partir de um HAR gravado, sem acessar a rede",
+    )
+    parser.add_argument(
+        "--fast",
+        action="store_true",
+        help="monta os registros pelos títulos da listagem, abrindo só "
+             "as páginas com campos faltando",
+    )
+    args = parser.parse_args()
+
+    data = run_scraper(
+        record_har=args.record_har,
+        replay_har=args.replay_har,
+        fast=args.fast,
+    )
 
     for r in data:
         print(asdict(r))